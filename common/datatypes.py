@@ -21,6 +21,7 @@
 from common.game_items import GamePurchase, GameClass, UnlockableGameClass, \
     UnlockableClassSpecificItem, UnlockableWeapon, UnlockableVoice
 from typing import Set, Iterable
+import functools
 import struct
 from ipaddress import IPv4Address
 
@@ -186,6 +187,9 @@ def hexparse(hexstring):
     return bytes([int('0x' + hexbyte, base=16) for hexbyte in hexstring.split()])
 
 
+# The capture file never changes while the server is running and only a handful
+# of ranges is ever requested, so keep the ranges in memory after the first read.
+@functools.lru_cache(maxsize=None)
 def _originalbytes(start, end):
     with open('resources/tribescapture.bin.stripped', 'rb') as f:
         f.seek(start)
@@ -2795,54 +2799,71 @@ class a003a(enumblockarray):
         ]
 
 
-class a003d(enumblockarray):
-    def __init__(self):
-        super().__init__(0x003d)
+# Class menu data is built once at startup and not modified afterwards, so the
+# unlock arrays derived from it are built once per instance and then shared.
+# Entries hold a reference to the menu data to keep its id() from being reused.
+_menu_unlock_arrays_cache = {}
 
-    def set_menu_data(self, class_menu_data):
-        ids_to_unlock = [item.item_id for item in class_menu_data.get_every_item() if item.unlocked]
 
-        general_unlocks_arrays = []
-        for purchase_index, general_item in enumerate(ids_to_unlock, start=10000):
-            general_unlocks_arrays.append([
-                m0263().set(purchase_index),
-                m026d().set(general_item)
-            ])
+def _get_menu_unlock_arrays(class_menu_data):
+    cache_entry = _menu_unlock_arrays_cache.get(id(class_menu_data))
+    if cache_entry is not None and cache_entry[0] is class_menu_data:
+        return cache_entry[1], cache_entry[2]
 
+    ids_to_unlock = [item.item_id for item in class_menu_data.get_every_item() if item.unlocked]
+
+    general_unlocks_arrays = []
+    for purchase_index, general_item in enumerate(ids_to_unlock, start=10000):
         general_unlocks_arrays.append([
-            m00c6().set(0x00002B76),
-            m037f().set(0x00002B76),
-            m0263().set(0x10123456),
-            m026d().set(0x00001CFE),
-            # m05b8(),
-            m056a(),
+            m0263().set(purchase_index),
+            m026d().set(general_item)
         ])
 
-        skin_unlocks_arrays = [[
-            m0095().set(0x00ba8dc7 + idx),
-            m0363().set(game_class.class_id),
-            m00a2().set(str(game_class.secondary_id)),
-            m0138(),
-            m02fe(),
-            m02b2(),
-            m021f(),
-            m057d(),
-            m057e(),
-            m057f().set(0x27a4),
-            m05e2(),
-            m0684(),
-            m05dc(),
-            m04cb(),
-            m00d4(),
-            m025c(),
-            m025d(),
-            m025e(),
-            m025f().set(0xFFFFF448),
-            m0596(),
-            m0597()
-        ]
-            for idx, (name, game_class)
-            in enumerate(class_menu_data.classes.items())]
+    general_unlocks_arrays.append([
+        m00c6().set(0x00002B76),
+        m037f().set(0x00002B76),
+        m0263().set(0x10123456),
+        m026d().set(0x00001CFE),
+        # m05b8(),
+        m056a(),
+    ])
+
+    skin_unlocks_arrays = [[
+        m0095().set(0x00ba8dc7 + idx),
+        m0363().set(game_class.class_id),
+        m00a2().set(str(game_class.secondary_id)),
+        m0138(),
+        m02fe(),
+        m02b2(),
+        m021f(),
+        m057d(),
+        m057e(),
+        m057f().set(0x27a4),
+        m05e2(),
+        m0684(),
+        m05dc(),
+        m04cb(),
+        m00d4(),
+        m025c(),
+        m025d(),
+        m025e(),
+        m025f().set(0xFFFFF448),
+        m0596(),
+        m0597()
+    ]
+        for idx, (name, game_class)
+        in enumerate(class_menu_data.classes.items())]
+
+    _menu_unlock_arrays_cache[id(class_menu_data)] = (class_menu_data, general_unlocks_arrays, skin_unlocks_arrays)
+    return general_unlocks_arrays, skin_unlocks_arrays
+
+
+class a003d(enumblockarray):
+    def __init__(self):
+        super().__init__(0x003d)
+
+    def set_menu_data(self, class_menu_data):
+        general_unlocks_arrays, skin_unlocks_arrays = _get_menu_unlock_arrays(class_menu_data)
 
         self.content = [
             m03e3(),
@@ -18,7 +18,9 @@
 # along with taserver.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+from collections import deque
 import os
+import re
 
 MIN_UNVERIFIED_ID = 1000000
 MAX_UNVERIFIED_ID = 2000000
@@ -28,6 +30,8 @@ AUTHBOT_ID = MIN_UNVERIFIED_ID - 1
 MIN_VERIFIED_ID = 1
 MAX_VERIFIED_ID = AUTHBOT_ID - 1
 
+_VALID_NAME_BYTES_RE = re.compile(rb'[^\x00-\x20\x7f-\xff#/:?\\`~]*')
+
 def get_shared_ini_path(data_root):
     return os.path.join(data_root, 'shared.ini')
 
@@ -40,5 +44,38 @@ def first_unused_number_above(numbers, minimum, maximum=None):
     return first_number_above
 
 
+class NumberAllocator:
+    def __init__(self, minimum, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.next_number = minimum
+        self.released_numbers = deque()
+        self.released_number_set = set()
+
+    def in_range(self, number):
+        return number >= self.minimum and (self.maximum is None or number <= self.maximum)
+
+    def allocate(self):
+        if self.released_numbers:
+            number = self.released_numbers.popleft()
+            self.released_number_set.remove(number)
+            return number
+
+        if self.maximum is not None and self.next_number > self.maximum:
+            raise RuntimeError(f'Unable to allocate an unused number between {self.minimum} and {self.maximum}. All are in use.')
+
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def release(self, number):
+        if not self.in_range(number) or number >= self.next_number:
+            raise ValueError(f'Unable to release number {number}, because it was never allocated')
+        if number in self.released_number_set:
+            raise ValueError(f'Unable to release number {number}, because it was already released')
+        self.released_numbers.append(number)
+        self.released_number_set.add(number)
+
+
 def is_valid_ascii_for_name(ascii_bytes):
-    return all((33 <= c <= 126 and chr(c) not in r'#/:?\`~') for c in ascii_bytes)
+    return _VALID_NAME_BYTES_RE.fullmatch(ascii_bytes) is not None
@@ -19,8 +19,10 @@
 #
 
 from distutils.version import StrictVersion
+import functools
 import gevent
 import hashlib
+import json
 import logging
 import random
 import string
@@ -44,6 +46,19 @@ from .social_network import SocialNetwork
 from common import utils
 
 UNUSED_AUTHCODE_CHECK_TIME = 3600
+AUTHCODE_LENGTH = 8
+AUTHCODE_ALPHABET = ''.join(c for c in (string.ascii_letters + string.digits) if c not in 'O0Il')
+
+USERNAME_TOO_SHORT_ERROR = 'User name is too short, min length is %d characters.' % Player.min_name_length
+USERNAME_TOO_LONG_ERROR = 'User name is too long, max length is %d characters.' % Player.max_name_length
+USERNAME_NON_ASCII_ERROR = 'User name contains invalid (i.e. non-ascii) characters'
+USERNAME_INVALID_CHARACTERS_ERROR = 'User name contains invalid characters'
+USERNAME_RESERVED_ERROR = 'User name is reserved'
+
+_json_status_encoder = json.JSONEncoder(sort_keys=True, indent=4)
+
+# Launchers keep reconnecting with the same handful of versions
+_parse_launcher_version = functools.lru_cache(maxsize=64)(StrictVersion)
 
 
 @statetracer('address_pair', 'game_servers', 'players')
@@ -53,10 +68,15 @@ class LoginServer:
         self.server_queue = server_queue
         self.client_queues = client_queues
         self.server_stats_queue = server_stats_queue
+        self.cached_status_response = (None, None)
 
         self.game_servers = TracingDict()
+        self.game_servers_by_match_id = {}
+        self.server_id_allocator = utils.NumberAllocator(1)
 
         self.players = TracingDict()
+        self.players_by_display_name_lower = {}
+        self.unverified_id_allocator = utils.NumberAllocator(utils.MIN_UNVERIFIED_ID, utils.MAX_UNVERIFIED_ID)
         self.social_network = SocialNetwork()
         self.firewall = FirewallClient(ports)
         self.accounts = accounts
@@ -81,6 +101,16 @@ class LoginServer:
             Launcher2LoginMatchEndMessage: self.handle_match_end_message,
             Launcher2LoginWaitingForMap: self.handle_waiting_for_map_message,
         }
+        self.peer_connected_handlers = {
+            Player: self._handle_player_connected,
+            GameServer: self._handle_game_server_connected,
+            AuthCodeRequester: self._handle_authcode_requester_connected,
+        }
+        self.peer_disconnected_handlers = {
+            Player: self._handle_player_disconnected,
+            GameServer: self._handle_game_server_disconnected,
+            AuthCodeRequester: self._handle_authcode_requester_disconnected,
+        }
         self.pending_callbacks = PendingCallbacks(server_queue)
         self.last_player_update_time = datetime.datetime.utcnow()
 
@@ -104,32 +134,37 @@ class LoginServer:
         gevent.getcurrent().name = 'loginserver'
         self.logger.info('login server started')
         self.firewall.reset_firewall('blacklist')
+        handlers = self.message_handlers
+        get_message = self.server_queue.get
         while True:
-            for message in self.server_queue:
-                handler = self.message_handlers[type(message)]
-                try:
-                    handler(message)
-                except Exception as e:
-                    if hasattr(message, 'peer'):
-                        self.logger.error('an exception occurred while handling a message; passing it on to the peer...')
-                        message.peer.disconnect(e)
-                    else:
-                        raise
+            message = get_message()
+            handler = handlers.get(type(message))
+            if handler is None:
+                raise KeyError(f'No handler registered for message type {type(message).__name__}')
+            try:
+                handler(message)
+            except Exception as e:
+                peer = getattr(message, 'peer', None)
+                if peer is not None:
+                    self.logger.error('an exception occurred while handling a message; passing it on to the peer...')
+                    peer.disconnect(e)
+                else:
+                    raise
 
     def all_game_servers(self):
         return self.game_servers
 
     def find_server_by_id(self, server_id):
-        for game_server in self.all_game_servers().values():
-            if game_server.server_id == server_id:
-                return game_server
-        raise ProtocolViolationError('No server found with specified server ID')
+        try:
+            return self.game_servers[server_id]
+        except KeyError:
+            raise ProtocolViolationError('No server found with specified server ID')
 
     def find_server_by_match_id(self, match_id):
-        for game_server in self.all_game_servers().values():
-            if game_server.match_id == match_id:
-                return game_server
-        raise ProtocolViolationError('No server found with specified match ID')
+        try:
+            return self.game_servers_by_match_id[match_id]
+        except KeyError:
+            raise ProtocolViolationError('No server found with specified match ID')
 
     def find_player_by(self, **kwargs):
         matching_players = self.find_players_by(**kwargs)
@@ -140,48 +175,53 @@ class LoginServer:
         return matching_players[0] if matching_players else None
 
     def find_players_by(self, **kwargs):
-        matching_players = self.players.values()
-        for key, val in kwargs.items():
-            matching_players = [player for player in matching_players if getattr(player, key) == val]
-
-        return matching_players
+        return [player for player in self.players.values()
+                if all(getattr(player, key) == val for key, val in kwargs.items())]
 
     def find_player_by_display_name(self, display_name):
-        matching_players = [p for p in self.players.values()
-                            if p.display_name is not None and p.display_name.lower() == display_name.lower()]
-        if matching_players:
-            return matching_players[0]
-        else:
-            return None
+        return self.players_by_display_name_lower.get(display_name.lower())
+
+    def register_display_name(self, player, display_name):
+        self.unregister_display_name(player)
+        player.display_name = display_name
+        self.players_by_display_name_lower[display_name.lower()] = player
+
+    def unregister_display_name(self, player):
+        if player.display_name is not None:
+            display_name_lower = player.display_name.lower()
+            if self.players_by_display_name_lower.get(display_name_lower) is player:
+                del self.players_by_display_name_lower[display_name_lower]
 
     def change_player_unique_id(self, old_id, new_id):
-        if new_id in self.players:
+        players = self.players
+        if new_id in players:
             raise AlreadyLoggedInError()
 
-        assert old_id in self.players
-        assert new_id not in self.players
-
-        player = self.players.pop(old_id)
+        # A KeyError here means the player was never registered, which is a bug
+        player = players.pop(old_id)
         player.unique_id = new_id
-        self.players[new_id] = player
+        players[new_id] = player
+
+        if self.unverified_id_allocator.in_range(old_id):
+            self.unverified_id_allocator.release(old_id)
 
     def validate_username(self, username):
         if len(username) < Player.min_name_length:
-            return 'User name is too short, min length is %d characters.' % Player.min_name_length
+            return USERNAME_TOO_SHORT_ERROR
 
         if len(username) > Player.max_name_length:
-            return 'User name is too long, max length is %d characters.' % Player.max_name_length
+            return USERNAME_TOO_LONG_ERROR
 
         try:
             ascii_bytes = username.encode('ascii')
         except UnicodeError:
-            return 'User name contains invalid (i.e. non-ascii) characters'
+            return USERNAME_NON_ASCII_ERROR
 
         if not utils.is_valid_ascii_for_name(ascii_bytes):
-            return 'User name contains invalid characters'
+            return USERNAME_INVALID_CHARACTERS_ERROR
 
         if username.lower() == 'taserverbot':
-            return 'User name is reserved'
+            return USERNAME_RESERVED_ERROR
 
         return None
 
@@ -203,16 +243,15 @@ class LoginServer:
 
         validation_failure = self.validate_username(msg.login_name)
         if validation_failure:
-            self.logger.warning("authcode requested for invalid user name '%s': %s. Refused."
-                                % (msg.login_name, validation_failure))
+            self.logger.warning("authcode requested for invalid user name '%s': %s. Refused.",
+                                msg.login_name, validation_failure)
             authcode_requester.send('Error: %s' % validation_failure)
         else:
-            availablechars = ''.join(c for c in (string.ascii_letters + string.digits) if c not in 'O0Il')
-            authcode = ''.join([random.choice(availablechars) for i in range(8)])
+            authcode = ''.join(random.choices(AUTHCODE_ALPHABET, k=AUTHCODE_LENGTH))
             email_hash = self.email_address_to_hash(msg.email_address)
 
             if msg.login_name not in self.accounts or self.accounts[msg.login_name].email_hash == email_hash:
-                self.logger.info('authcode requested for %s, returned %s' % (msg.login_name, authcode))
+                self.logger.info('authcode requested for %s, returned %s', msg.login_name, authcode)
                 self.accounts.update_account(msg.login_name, email_hash, authcode)
                 self.accounts.save()
 
@@ -243,6 +282,7 @@ class LoginServer:
     def handle_register_as_bot_message(self, msg):
         bot = msg.peer.authbot
         self.players[utils.AUTHBOT_ID] = bot
+        self.register_display_name(bot, bot.display_name)
         bot.friends.connect_to_social_network(self.social_network)
         bot.friends.notify_online()
 
@@ -257,86 +297,102 @@ class LoginServer:
         self.pending_callbacks.execute(callback_id)
 
     def handle_client_connected_message(self, msg):
-        if isinstance(msg.peer, Player):
-            unique_id = utils.first_unused_number_above(self.players.keys(),
-                                                        utils.MIN_UNVERIFIED_ID,
-                                                        utils.MAX_UNVERIFIED_ID)
-
-            player = msg.peer
-            player.friends.connect_to_social_network(self.social_network)
-            player.unique_id = unique_id
-            player.login_server = self
-            player.complement_address_pair(self.address_pair)
-            player.set_state(UnauthenticatedState)
-            self.players[unique_id] = player
-        elif isinstance(msg.peer, GameServer):
-            server_id = utils.first_unused_number_above(self.all_game_servers().keys(), 1)
-
-            game_server = msg.peer
-            game_server.server_id = server_id
-            game_server.match_id = server_id + 10000000
-            game_server.game_setting_mode = None
-            game_server.login_server = self
-
-            self.game_servers[server_id] = game_server
-
-            self.logger.info(f'{game_server}: added')
-        elif isinstance(msg.peer, AuthCodeRequester):
-            pass
-        else:
-            assert False, "Invalid connection message received"
+        handler = self.peer_connected_handlers.get(type(msg.peer))
+        if handler is None:
+            raise TypeError(f'Invalid connection message received for a peer of type {type(msg.peer).__name__}')
+        handler(msg.peer)
 
     def handle_client_disconnected_message(self, msg):
-        if isinstance(msg.peer, Player):
-            player = msg.peer
-            player.disconnect()
-            self.pending_callbacks.remove_receiver(player)
-            player.set_state(OfflineState)
-            del(self.players[player.unique_id])
-
-        elif isinstance(msg.peer, GameServer):
-            game_server = msg.peer
-            self.logger.info(f'{game_server}: removed')
-            game_server.disconnect()
-            self.pending_callbacks.remove_receiver(game_server)
-            del (self.game_servers[game_server.server_id])
-
-        elif isinstance(msg.peer, AuthCodeRequester):
-            if utils.AUTHBOT_ID in self.players and self.players[utils.AUTHBOT_ID] == msg.peer.authbot:
-                msg.peer.authbot.friends.notify_offline()
-            msg.peer.disconnect()
-
-        else:
-            assert False, "Invalid disconnection message received"
+        handler = self.peer_disconnected_handlers.get(type(msg.peer))
+        if handler is None:
+            raise TypeError(f'Invalid disconnection message received for a peer of type {type(msg.peer).__name__}')
+        handler(msg.peer)
+
+    def _handle_player_connected(self, player):
+        unique_id = self.unverified_id_allocator.allocate()
+
+        player.friends.connect_to_social_network(self.social_network)
+        player.unique_id = unique_id
+        player.login_server = self
+        player.complement_address_pair(self.address_pair)
+        player.set_state(UnauthenticatedState)
+        self.players[unique_id] = player
+
+    def _handle_game_server_connected(self, game_server):
+        server_id = self.server_id_allocator.allocate()
+
+        game_server.server_id = server_id
+        game_server.match_id = server_id + 10000000
+        game_server.game_setting_mode = None
+        game_server.login_server = self
+
+        self.game_servers[server_id] = game_server
+        self.game_servers_by_match_id[game_server.match_id] = game_server
+
+        self.logger.info(f'{game_server}: added')
+
+    def _handle_authcode_requester_connected(self, authcode_requester):
+        pass
+
+    def _handle_player_disconnected(self, player):
+        player.disconnect()
+        self.pending_callbacks.remove_receiver(player)
+        player.set_state(OfflineState)
+        self.unregister_display_name(player)
+        del(self.players[player.unique_id])
+        if self.unverified_id_allocator.in_range(player.unique_id):
+            self.unverified_id_allocator.release(player.unique_id)
+
+    def _handle_game_server_disconnected(self, game_server):
+        self.logger.info(f'{game_server}: removed')
+        game_server.disconnect()
+        self.pending_callbacks.remove_receiver(game_server)
+        del (self.game_servers[game_server.server_id])
+        del (self.game_servers_by_match_id[game_server.match_id])
+        self.server_id_allocator.release(game_server.server_id)
+
+    def _handle_authcode_requester_disconnected(self, authcode_requester):
+        if utils.AUTHBOT_ID in self.players and self.players[utils.AUTHBOT_ID] == authcode_requester.authbot:
+            authcode_requester.authbot.friends.notify_offline()
+        authcode_requester.disconnect()
 
     def handle_client_message(self, msg):
         current_player = msg.peer
         current_player.last_received_seq = msg.clientseq
 
+        handle_request = current_player.handle_request
+        log_info = self.logger.info
         for request in msg.requests:
-            if not current_player.handle_request(request):
-                self.logger.info('%s sent: %04X' % (current_player, request.ident))
+            if not handle_request(request):
+                log_info('%s sent: %04X', current_player, request.ident)
 
         # This output is mostly for debugging of the incorrect number of players/servers online
         current_time = datetime.datetime.utcnow()
         if int((current_time - self.last_player_update_time).total_seconds()) > 15 * 60:
-            self.logger.info('currently online players:\n%s' % '\n'.join([f'    {p}' for p in self.players.values()]))
-            self.logger.info('currently online servers:\n%s' % '\n'.join([f'    {s}' for s in self.game_servers.values()]))
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info('currently online players:\n%s', '\n'.join([f'    {p}' for p in self.players.values()]))
+                self.logger.info('currently online servers:\n%s', '\n'.join([f'    {s}' for s in self.game_servers.values()]))
             self.last_player_update_time = current_time
 
     def handle_http_request_message(self, msg):
         if msg.env['PATH_INFO'] == '/status':
             if "REMOTE_ADDR" in msg.env:
-                self.logger.info('Served status request via HTTP to peer "' + msg.env["REMOTE_ADDR"] + '"')
+                self.logger.info('Served status request via HTTP to peer "%s"', msg.env['REMOTE_ADDR'])
             else:
                 self.logger.info('Served status request via HTTP to Unknown peer')
-            msg.peer.send_response(json.dumps({
-                'online_players': len(self.players),
-                'online_servers': len(self.game_servers)
-            }, sort_keys=True, indent=4))
+            # The response only depends on the counts, so reuse it until they change
+            counts = (len(self.players), len(self.game_servers))
+            cached_counts, response = self.cached_status_response
+            if counts != cached_counts:
+                response = _json_status_encoder.encode({
+                    'online_players': counts[0],
+                    'online_servers': counts[1]
+                })
+                self.cached_status_response = (counts, response)
+            msg.peer.send_response(response)
         elif msg.env['PATH_INFO'] == '/detailed_status':
             if "REMOTE_ADDR" in msg.env:
-                self.logger.info('Served detailed status request via HTTP to peer "' + msg.env["REMOTE_ADDR"] + '"')
+                self.logger.info('Served detailed status request via HTTP to peer "%s"', msg.env['REMOTE_ADDR'])
             else:
                 self.logger.info('Served detailed status request via HTTP to Unknown peer')
             online_game_servers_list = [
@@ -347,10 +403,10 @@ class LoginServer:
                  'type':        self.convert_map_id_to_map_name_and_game_type(gs.map_id)[1],
                  'players':     [p.display_name for p in gs.players.values()]} for gs in self.game_servers.values()
             ]
-            msg.peer.send_response(json.dumps({
+            msg.peer.send_response(_json_status_encoder.encode({
                 'online_players_list': [p.display_name for p in self.players.values()],
                 'online_servers_list': online_game_servers_list
-            }, sort_keys=True, indent=4))
+            }))
         else:
             msg.peer.send_response(None)
 
@@ -418,7 +474,7 @@ class LoginServer:
         return map_names_and_types.get(str(map_id), ["Unknown","Unknown"])
 
     def handle_launcher_protocol_version_message(self, msg):
-        launcher_version = StrictVersion(msg.version)
+        launcher_version = _parse_launcher_version(msg.version)
         my_version = launcher2loginserver_protocol_version
 
         if my_version.version[0] != launcher_version.version[0]:
@@ -450,14 +506,17 @@ class LoginServer:
 
     def handle_team_info_message(self, msg):
         game_server = msg.peer
+        players_on_server = game_server.players
+        log_warning = self.logger.warning
         for player_id, team_id in msg.player_to_team_id.items():
             player_id = int(player_id)
-            if player_id in self.players and self.players[player_id].game_server is game_server:
-                self.players[player_id].team = team_id
+            player = players_on_server.get(player_id)
+            if player is not None:
+                player.team = team_id
             else:
-                self.logger.warning('received an invalid message from %s about '
-                                    'player %d while that player is not on that server' %
-                                    (game_server, player_id))
+                log_warning('received an invalid message from %s about '
+                            'player %d while that player is not on that server',
+                            game_server, player_id)
 
     def handle_score_info_message(self, msg):
         game_server = msg.peer
@@ -454,7 +454,7 @@ class AuthenticatedState(PlayerState):
         server_id = request.findbytype(m02c7).value
         game_server = self.player.login_server.find_server_by_id(server_id)
         if game_server.joinable:
-            players = self.player.login_server.find_players_by(game_server=game_server)
+            players = list(game_server.players.values())
             reply = a01c6()
             reply.content = [
                 m02c7().set(server_id),
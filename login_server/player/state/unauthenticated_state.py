@@ -19,20 +19,31 @@
 # along with taserver.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import hmac
+
 from common.datatypes import *
 from common.game_items import get_unmodded_class_menu_data
 from .authenticated_state import AuthenticatedState
 from ..state.player_state import PlayerState, handles
 
 
-def choose_display_name(login_name, verified, names_in_use, max_name_length):
+# These parts of the login response are the same for every player and are not
+# modified after construction, so they can be shared between logins
+LOGIN_RESPONSE_ORIGINAL_BYTES_PARTS = (
+    m0662().set_original_bytes(0x8898, 0xdaff),
+    m0633().set_original_bytes(0xdaff, 0x19116),
+    m063e().set_original_bytes(0x19116, 0x1c6ee),
+    m067e().set_original_bytes(0x1c6ee, 0x1ec45),
+)
+
+
+def choose_display_name(login_name, verified, lowercase_names_in_use, max_name_length):
     if verified:
         display_name = login_name[:max_name_length]
     else:
         prefix = 'unvrf-'
         display_name = prefix + login_name[:max_name_length - len(prefix)]
         index = 2
-        lowercase_names_in_use = [name.lower() for name in names_in_use]
         while display_name.lower() in lowercase_names_in_use:
             display_name = 'unv%02d-%s' % (index, login_name[:max_name_length - len(prefix)])
             index += 1
@@ -85,7 +96,9 @@ class UnauthenticatedState(PlayerState):
             else:
                 try:
                     if (self.player.login_name in accounts and
-                            self.player.password_hash == accounts[self.player.login_name].password_hash):
+                            accounts[self.player.login_name].password_hash is not None and
+                            hmac.compare_digest(self.player.password_hash,
+                                                accounts[self.player.login_name].password_hash)):
                         new_unique_id = accounts[self.player.login_name].unique_id
                         self.logger.info('User successfully authenticated with user name %s '
                                          '(ID %d -> %d)' % (self.player.login_name,
@@ -116,20 +129,16 @@ class UnauthenticatedState(PlayerState):
                                       self.player.login_server.players[new_unique_id].address_pair))
 
                 else:
-                    names_in_use = [p.display_name for p in self.player.login_server.players.values()
-                                    if p.display_name is not None]
-                    self.player.display_name = choose_display_name(self.player.login_name,
-                                                                   self.player.verified,
-                                                                   names_in_use,
-                                                                   self.player.max_name_length)
+                    display_name = choose_display_name(self.player.login_name,
+                                                       self.player.verified,
+                                                       self.player.login_server.players_by_display_name_lower,
+                                                       self.player.max_name_length)
+                    self.player.login_server.register_display_name(self.player, display_name)
                     self.player.load()
                     self.player.send([
                         a003d().set_menu_data(get_unmodded_class_menu_data())
                                .set_player(self.player),
-                        m0662().set_original_bytes(0x8898, 0xdaff),
-                        m0633().set_original_bytes(0xdaff, 0x19116),
-                        m063e().set_original_bytes(0x19116, 0x1c6ee),
-                        m067e().set_original_bytes(0x1c6ee, 0x1ec45),
+                        *LOGIN_RESPONSE_ORIGINAL_BYTES_PARTS,
                         m0442().set_success(True),
                         m02fc().set(STDMSG_LOGIN_IS_VALID),
                         m0219(),
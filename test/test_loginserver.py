@@ -22,7 +22,11 @@ from ipaddress import IPv4Address
 import unittest
 import unittest.mock as mock
 
+from common.connectionhandler import PeerConnectedMessage, PeerDisconnectedMessage
+from common.ipaddresspair import IPAddressPair
 from login_server.gameserver import GameServer
+from login_server.loginserver import LoginServer
+from login_server.player.player import Player
 
 
 class TestGameServer(GameServer):
@@ -65,3 +69,56 @@ class GameServerTestCase(unittest.TestCase):
         self.gameserver.map_votes = {}
         self.gameserver.process_map_votes()
         self.assertEqual(self.gameserver.msg.map_id, 2)
+
+
+class LoginServerDisplayNameTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        address_pair = IPAddressPair(IPv4Address('8.8.8.8'), None)
+        with mock.patch.object(IPAddressPair, 'detect', return_value=(address_pair, None)), \
+             mock.patch('login_server.loginserver.FirewallClient'):
+            self.loginserver = LoginServer(mock.Mock(), None, mock.Mock(), None, mock.Mock())
+
+    def connect_player(self):
+        player = Player(('8.8.4.4', 1234), 'data')
+        player.outgoing_queue = mock.Mock()
+        self.loginserver.handle_client_connected_message(PeerConnectedMessage(player))
+        return player
+
+    def disconnect_player(self, player):
+        self.loginserver.handle_client_disconnected_message(PeerDisconnectedMessage(player))
+
+    def test_find_player_by_display_name__lookup_ignores_case(self):
+        player = self.connect_player()
+        self.loginserver.register_display_name(player, 'unvrf-Someone')
+        self.assertIs(self.loginserver.find_player_by_display_name('UNVRF-someone'), player)
+        self.assertIsNone(self.loginserver.find_player_by_display_name('someone'))
+
+    def test_register_display_name__renaming_removes_old_name(self):
+        player = self.connect_player()
+        self.loginserver.register_display_name(player, 'unvrf-Someone')
+        self.loginserver.register_display_name(player, 'Someone')
+        self.assertEqual(player.display_name, 'Someone')
+        self.assertIsNone(self.loginserver.find_player_by_display_name('unvrf-Someone'))
+        self.assertIs(self.loginserver.find_player_by_display_name('someone'), player)
+
+    def test_unregister_display_name__disconnect_removes_name(self):
+        player = self.connect_player()
+        self.loginserver.register_display_name(player, 'unvrf-Someone')
+        self.disconnect_player(player)
+        self.assertIsNone(self.loginserver.find_player_by_display_name('unvrf-Someone'))
+        self.assertEqual(self.loginserver.players_by_display_name_lower, {})
+
+    def test_unregister_display_name__disconnect_keeps_name_of_player_that_took_it_over(self):
+        unverified_player = self.connect_player()
+        verified_player = self.connect_player()
+        self.loginserver.register_display_name(unverified_player, 'unvrf-x')
+        self.loginserver.register_display_name(verified_player, 'unvrf-X')
+        self.assertIs(self.loginserver.find_player_by_display_name('unvrf-x'), verified_player)
+
+        self.disconnect_player(unverified_player)
+        self.assertIs(self.loginserver.find_player_by_display_name('unvrf-x'), verified_player)
+
+    def test_unregister_display_name__player_without_name_is_ignored(self):
+        player = self.connect_player()
+        self.loginserver.unregister_display_name(player)
+        self.assertEqual(self.loginserver.players_by_display_name_lower, {})
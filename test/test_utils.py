@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2021  Maurice van der Pot <griffon26@kfk4ever.com>
+#
+# This file is part of taserver
+#
+# taserver is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# taserver is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with taserver.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from common.utils import NumberAllocator, is_valid_ascii_for_name
+
+
+class NumberAllocatorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.allocator = NumberAllocator(10, 12)
+
+    def test_allocate__numbers_count_up_from_minimum(self):
+        self.assertEqual([self.allocator.allocate() for _ in range(3)], [10, 11, 12])
+
+    def test_allocate__released_numbers_are_reused_first(self):
+        self.allocator.allocate()
+        self.allocator.allocate()
+        self.allocator.release(10)
+        self.assertEqual(self.allocator.allocate(), 10)
+        self.assertEqual(self.allocator.allocate(), 12)
+
+    def test_allocate__fails_when_maximum_is_reached(self):
+        for _ in range(3):
+            self.allocator.allocate()
+        with self.assertRaises(RuntimeError):
+            self.allocator.allocate()
+
+    def test_allocate__without_maximum_keeps_counting(self):
+        allocator = NumberAllocator(1)
+        for _ in range(100):
+            allocator.allocate()
+        self.assertEqual(allocator.allocate(), 101)
+
+    def test_release__same_number_twice_fails(self):
+        self.allocator.allocate()
+        self.allocator.release(10)
+        with self.assertRaises(ValueError):
+            self.allocator.release(10)
+
+    def test_release__number_that_was_never_allocated_fails(self):
+        self.allocator.allocate()
+        with self.assertRaises(ValueError):
+            self.allocator.release(11)
+        with self.assertRaises(ValueError):
+            self.allocator.release(9)
+
+    def test_in_range__checks_bounds_only(self):
+        self.assertFalse(self.allocator.in_range(9))
+        self.assertTrue(self.allocator.in_range(10))
+        self.assertTrue(self.allocator.in_range(12))
+        self.assertFalse(self.allocator.in_range(13))
+        self.assertTrue(NumberAllocator(1).in_range(10 ** 9))
+
+
+class IsValidAsciiForNameTestCase(unittest.TestCase):
+    def test_empty_name_is_valid(self):
+        self.assertTrue(is_valid_ascii_for_name(b''))
+
+    def test_first_and_last_printable_characters_are_valid(self):
+        self.assertTrue(is_valid_ascii_for_name(b'!'))
+        self.assertTrue(is_valid_ascii_for_name(b'}'))
+        self.assertTrue(is_valid_ascii_for_name(b'Some_Name-123'))
+
+    def test_excluded_characters_are_invalid(self):
+        for c in b'#/:?\\`~':
+            with self.subTest(character=chr(c)):
+                self.assertFalse(is_valid_ascii_for_name(bytes([c])))
+                self.assertFalse(is_valid_ascii_for_name(b'ab' + bytes([c]) + b'cd'))
+
+    def test_control_space_and_non_ascii_bytes_are_invalid(self):
+        for c in [0x00, 0x1f, 0x20, 0x7f, 0x80, 0xff]:
+            with self.subTest(byte=c):
+                self.assertFalse(is_valid_ascii_for_name(bytes([c])))
+                self.assertFalse(is_valid_ascii_for_name(b'ab' + bytes([c])))
+
+    def test_exactly_the_printable_characters_minus_excluded_ones_are_valid(self):
+        valid_bytes = {c for c in range(256) if is_valid_ascii_for_name(bytes([c]))}
+        expected_bytes = set(range(0x21, 0x7f)) - set(b'#/:?\\`~')
+        self.assertEqual(valid_bytes, expected_bytes)